@@ -1,3 +1,4 @@
+import collections
 import logging
 from urllib.parse import urlparse
 
@@ -46,9 +47,13 @@ class BackendRegistry(type):
 class Backend(object, metaclass=BackendRegistry):
 
     def __init__(self, **kwargs):
-        self.next = {}
+        # pending paginated results, least recently used first
+        self.next = collections.OrderedDict()
 
-        interop_requirements_enforced = get_application_instance_config_values(APPLICATION_INSTANCE, "taxii", "interop_requirements")
+        # configuration does not change at runtime, so look this up only once
+        self.interop_requirements_enforced = get_application_instance_config_values(
+            APPLICATION_INSTANCE, "taxii", "interop_requirements"
+        )
         if kwargs.get("run_cleanup_threads", True):
             self.timeout = kwargs.get("session_timeout", 30)
             checker = TaskChecker(kwargs.get("check_interval", 10), self._pop_expired_sessions)
@@ -56,13 +61,13 @@ class Backend(object, metaclass=BackendRegistry):
 
             self.status_retention = kwargs.get("status_retention", SECONDS_IN_24_HOURS)
             if self.status_retention != -1:
-                if self.status_retention < SECONDS_IN_24_HOURS and interop_requirements_enforced:
+                if self.status_retention < SECONDS_IN_24_HOURS and self.interop_requirements_enforced:
                     # interop MUST requirement
                     raise InitializationError("Status retention interval must be more than 24 hours", 408)
                 status_checker = TaskChecker(kwargs.get("check_interval", 10), self._pop_old_statuses)
                 status_checker.start()
         else:
-            if interop_requirements_enforced:
+            if self.interop_requirements_enforced:
                 # interop MUST requirement
                 raise InitializationError("Status retention interval must be more than 24 hours", 408)
 
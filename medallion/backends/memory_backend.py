@@ -3,17 +3,23 @@ import io
 import json
 import logging
 import os
+import shutil
+import sys
 import uuid
 
 import environ
 from six import string_types
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from ..common import (
-    APPLICATION_INSTANCE, create_resource, datetime_to_float,
-    datetime_to_string, determine_spec_version, determine_version, find_att,
-    generate_status, generate_status_details,
-    get_application_instance_config_values, get_timestamp, iterpath,
-    string_to_datetime
+    create_resource, datetime_to_float, datetime_to_string,
+    determine_spec_version, determine_version, find_att, generate_status,
+    generate_status_details, get_timestamp, has_long_number,
+    media_type_for_spec_version, parse_request_parameters, string_to_datetime
 )
 from ..exceptions import InitializationError, ProcessingError
 from ..filters.basic_filter import BasicFilter
@@ -23,10 +29,43 @@ from .base import Backend
 log = logging.getLogger(__name__)
 
 
-def remove_hidden_field(objs):
-    for obj in objs:
-        if "_date_added" in obj:
-            del obj["_date_added"]
+def without_hidden_field(objs):
+    """Return copies of the objects without the internal "_date_added" field.
+    Objects that don't have it are returned as they are."""
+    return [
+        {k: v for k, v in obj.items() if k != "_date_added"} if "_date_added" in obj else obj
+        for obj in objs
+    ]
+
+
+def iter_json_chunks(obj, depth):
+    """Encode ``obj`` with orjson as a sequence of byte chunks. Containers are
+    split into one chunk per item for the first ``depth`` levels, so only one
+    item (e.g. a single collection) is held in encoded form at a time."""
+    if depth and isinstance(obj, dict):
+        yield b"{"
+        for i, (key, value) in enumerate(obj.items()):
+            yield (b"," if i else b"") + orjson.dumps(key) + b":"
+            yield from iter_json_chunks(value, depth - 1)
+        yield b"}"
+    elif depth and isinstance(obj, list):
+        yield b"["
+        for i, value in enumerate(obj):
+            if i:
+                yield b","
+            yield from iter_json_chunks(value, depth - 1)
+        yield b"]"
+    else:
+        yield orjson.dumps(obj)
+
+
+def collection_metadata(collection):
+    """Shallow copy of a collection without the data that is not part of the
+    Collection resource (objects, manifest and responses)."""
+    return {
+        k: copy.copy(v) for k, v in collection.items()
+        if k not in ("manifest", "responses", "objects")
+    }
 
 
 def find_headers(headers, manifest, obj):
@@ -58,6 +97,13 @@ class MemoryBackend(Backend):
                 "it does not provide an external data backend. "
                 "Set the 'force_wsgi' backend option to true to skip this."
             )
+        # objects and manifest entries grouped by object id, keyed by
+        # (api_root, collection_id) and built on first use
+        self.object_index = {}
+        self.manifest_index = {}
+        self.sorted_collections = {}
+        self.collections_by_id = {}
+        self.max_sessions = kwargs.get("max_sessions", 1024)
         if kwargs.get("filename"):
             self.load_data_from_file(kwargs.get("filename"))
             self.collections_manifest_check()
@@ -65,53 +111,85 @@ class MemoryBackend(Backend):
             self.data = {}
         super(MemoryBackend, self).__init__(**kwargs)
 
+    def _get_collection(self, api_root, collection_id):
+        # collections are never added at runtime, so each api root's
+        # collections are mapped by id the first time one is requested
+        if api_root not in self.collections_by_id:
+            collections = self.data[api_root].get("collections", [])
+            self.collections_by_id[api_root] = {
+                c["id"]: c for c in reversed(collections) if "id" in c
+            }
+        return self.collections_by_id[api_root].get(collection_id)
+
+    def _get_object_index(self, api_root, collection):
+        key = (api_root, collection["id"])
+        if key not in self.object_index:
+            index = {}
+            for obj in collection.get("objects", []):
+                index.setdefault(obj["id"], []).append(obj)
+            self.object_index[key] = index
+        return self.object_index[key]
+
+    def _get_manifest_index(self, api_root, collection):
+        key = (api_root, collection["id"])
+        if key not in self.manifest_index:
+            index = {}
+            for man in collection.get("manifest", []):
+                index.setdefault(man["id"], []).append(man)
+            self.manifest_index[key] = index
+        return self.manifest_index[key]
+
     def _pop_expired_sessions(self):
-        expired_ids = []
+        # sessions are kept in order of their last request, so the expired
+        # ones are all at the front
         boundary = datetime_to_float(get_timestamp())
-        for next_id, record in self.next.items():
-            if boundary - record["request_time"] > self.timeout:
-                expired_ids.append(next_id)
-
-        for item in expired_ids:
-            self.next.pop(item)
+        while self.next:
+            next_id, record = next(iter(self.next.items()))
+            if boundary - record["request_time"] <= self.timeout:
+                break
+            self.next.pop(next_id, None)
 
     def _pop_old_statuses(self):
         api_roots = self._get_all_api_roots()
         boundary = datetime_to_float(get_timestamp())
+        oldest_allowed = boundary - self.status_retention
         for ar in api_roots:
-            statuses_of_api_root = copy.copy(self._get_api_root_statuses(ar))
-            for s in statuses_of_api_root:
-                if boundary - datetime_to_float(string_to_datetime(s["request_timestamp"])) > self.status_retention:
-                    self._get_api_root_statuses(ar).remove(s)
+            statuses_of_api_root = self._get_api_root_statuses(ar)
+            # only look at the statuses present now; ones appended concurrently
+            # by add_objects sit past this point and are left untouched
+            count = len(statuses_of_api_root)
+            kept = []
+            for s in statuses_of_api_root[:count]:
+                if datetime_to_float(string_to_datetime(s["request_timestamp"])) < oldest_allowed:
                     log.info("Status {} was deleted from {} because it was older than the status retention time".format(s['id'], ar))
+                else:
+                    kept.append(s)
+            if len(kept) != count:
+                statuses_of_api_root[:count] = kept
 
     def set_next(self, objects, args):
         u = str(uuid.uuid4())
-        if "limit" in args:
-            del args["limit"]
-        for arg in args:
-            new_list = args[arg].split(',')
-            new_list.sort()
-            args[arg] = new_list
-        d = {"objects": objects, "args": args, "request_time": datetime_to_float(get_timestamp())}
+        d = {
+            "objects": objects,
+            "offset": 0,
+            "args": parse_request_parameters(args),
+            "request_time": datetime_to_float(get_timestamp()),
+        }
+        # drop the least recently used sessions so abandoned paginations don't pile up
+        while self.next and len(self.next) >= self.max_sessions:
+            self.next.popitem(last=False)
         self.next[u] = d
         return u
 
-    def get_next(self, filter_args, allowed, manifest, lim):
+    def get_next(self, filter_args, allowed, manifest_index, lim):
         n = filter_args["next"]
         if n in self.next:
-            for arg in filter_args:
-                new_list = filter_args[arg].split(',')
-                new_list.sort()
-                filter_args[arg] = new_list
-            del filter_args["next"]
-            del filter_args["limit"]
-            if filter_args != self.next[n]["args"]:
+            if parse_request_parameters(filter_args) != self.next[n]["args"]:
                 raise ProcessingError("The server did not understand the request or filter parameters: params changed over subsequent transaction", 400)
             t = self.next[n]["objects"]
-            length = len(self.next[n]["objects"])
+            start = self.next[n]["offset"]
+            length = len(t) - start
             headers = {}
-            ret = []
             if length <= lim:
                 limit = length
                 more = False
@@ -120,16 +198,26 @@ class MemoryBackend(Backend):
                 limit = lim
                 more = True
 
-            for i in range(0, limit):
-                x = t.pop(0)
-                ret.append(x)
-                if len(headers) == 0:
-                    find_headers(headers, manifest, x)
-                if i == limit - 1:
-                    find_headers(headers, manifest, x)
+            # the pending objects are never copied, only the offset of the
+            # next page is moved forward
+            ret = t[start:start + limit]
+            self.next[n]["offset"] = start + limit
+            # the first item with a manifest entry sets the first header and
+            # the last such item the last one; only the manifest entries
+            # sharing an item's id need to be checked
+            for x in ret:
+                if headers:
+                    break
+                find_headers(headers, manifest_index.get(x["id"], []), x)
+            for x in reversed(ret):
+                if "X-TAXII-Date-Added-Last" in headers or not headers:
+                    break
+                find_headers(headers, manifest_index.get(x["id"], []), x)
             if not more:
                 self.next.pop(n)
             else:
+                self.next[n]["request_time"] = datetime_to_float(get_timestamp())
+                self.next.move_to_end(n)
                 nex = n
 
             return ret, more, headers, nex
@@ -162,130 +250,160 @@ class MemoryBackend(Backend):
                         raise InitializationError("Object with id {} from {} is missing a manifest".format(obj['id'], obj_time), 408)
 
     def load_data_from_file(self, filename):
+        self.object_index = {}
+        self.manifest_index = {}
+        self.sorted_collections = {}
+        self.collections_by_id = {}
         if isinstance(filename, string_types):
-            with io.open(filename, "r", encoding="utf-8") as infile:
-                self.data = json.load(infile)
+            with io.open(filename, "rb") as infile:
+                self.data = self._load_json(infile)
         else:
-            self.data = json.load(filename)
+            self.data = self._load_json(filename)
+        self._intern_media_types()
+
+    def _intern_media_types(self):
+        # every manifest entry carries one of a handful of media types, so
+        # share a single string object for each of them
+        for api_info in self.data.values():
+            for collection in api_info.get("collections", []):
+                if "media_types" in collection:
+                    collection["media_types"] = [sys.intern(m) for m in collection["media_types"]]
+                for man in collection.get("manifest", []):
+                    if "media_type" in man:
+                        man["media_type"] = sys.intern(man["media_type"])
+
+    @staticmethod
+    def _load_json(infile):
+        # orjson accepts both str and bytes, so text and binary file objects work
+        data = infile.read()
+        if orjson and not has_long_number(data):
+            return orjson.loads(data)
+        return json.loads(data)
 
     def save_data_to_file(self, filename, **kwargs):
-        """The kwargs are passed to ``json.dump()`` if provided."""
+        """The kwargs are passed to ``json.dump()`` if provided. When orjson is
+        installed and either no kwargs or only ``indent=2`` (the one indentation
+        orjson supports) are given, it is used to serialize the data instead.
+        Its output holds the same data, but is laid out differently: without
+        kwargs it is compact, and non-ASCII characters are never escaped.
+
+        A file name is written through a temporary file that then replaces
+        it, so a failed save leaves the previous file in place."""
         if isinstance(filename, string_types):
-            with io.open(filename, "w", encoding="utf-8") as outfile:
-                json.dump(self.data, outfile, **kwargs)
+            tmp_filename = filename + ".tmp"
+            try:
+                if not (orjson and (not kwargs or kwargs == {"indent": 2}) and self._save_with_orjson(tmp_filename, kwargs)):
+                    with io.open(tmp_filename, "w", encoding="utf-8") as outfile:
+                        json.dump(self.data, outfile, **kwargs)
+                if os.path.exists(filename):
+                    shutil.copymode(filename, tmp_filename)
+                os.replace(tmp_filename, filename)
+            except Exception:
+                if os.path.exists(tmp_filename):
+                    os.remove(tmp_filename)
+                raise
         else:
             json.dump(self.data, filename, **kwargs)
 
-    def _get(self, key):
-        for ancestors, item in iterpath(self.data):
-            if key in ancestors:
-                return item
+    def _save_with_orjson(self, filename, kwargs):
+        """Returns False if orjson can't encode the data (e.g. integers over
+        64 bits), in which case ``filename`` has to be written again."""
+        try:
+            with io.open(filename, "wb") as outfile:
+                if not kwargs:
+                    # data -> api root -> collections/status -> single item
+                    outfile.writelines(iter_json_chunks(self.data, 3))
+                else:
+                    outfile.write(orjson.dumps(self.data, option=orjson.OPT_INDENT_2))
+        except orjson.JSONEncodeError:
+            return False
+        return True
 
     def server_discovery(self):
-        return self._get("/discovery")
-
-    def _update_manifest(self, new_obj, api_root, collection_id, request_time):
-        api_info = self._get(api_root)
-        collections = api_info.get("collections", [])
-        media_type_fmt = "application/stix+json;version={}"
-
-        for collection in collections:
-            if collection_id == collection["id"]:
-                version = determine_version(new_obj, request_time)
-                request_time = datetime_to_string(request_time)
-                media_type = media_type_fmt.format(determine_spec_version(new_obj))
-
-                # version is a single value now, therefore a new manifest is always created
-                collection["manifest"].append(
-                    {
-                        "id": new_obj["id"],
-                        "date_added": request_time,
-                        "version": version,
-                        "media_type": media_type,
-                    },
-                )
-
-                # if the media type is new, attach it to the collection
-                if media_type not in collection["media_types"]:
-                    collection["media_types"].append(media_type)
-
-                # quit once you have found the collection that needed updating
-                break
+        return self.data.get("/discovery")
+
+    def _update_manifest(self, new_obj, api_root, collection, date_added, version, known_media_types):
+        media_type = media_type_for_spec_version(determine_spec_version(new_obj))
+
+        # version is a single value now, therefore a new manifest is always created
+        man = {
+            "id": new_obj["id"],
+            "date_added": date_added,
+            "version": version,
+            "media_type": media_type,
+        }
+        collection["manifest"].append(man)
+        if (api_root, collection["id"]) in self.manifest_index:
+            self.manifest_index[(api_root, collection["id"])].setdefault(man["id"], []).append(man)
+
+        # if the media type is new, attach it to the collection
+        # (known_media_types is a set mirroring collection["media_types"])
+        if media_type not in known_media_types:
+            known_media_types.add(media_type)
+            collection["media_types"].append(media_type)
 
     def get_collections(self, api_root):
         if api_root not in self.data:
             return None  # must return None so 404 is raised
 
-        api_info = self._get(api_root)
-        collections = copy.deepcopy(api_info.get("collections", []))
-
+        api_info = self.data[api_root]
+        collections = api_info.get("collections", [])
+        # interop wants results sorted by id; collections are never added at
+        # runtime, so the sorted order is only computed once per api root
+        if self.interop_requirements_enforced:
+            if api_root not in self.sorted_collections:
+                self.sorted_collections[api_root] = sorted(collections, key=lambda o: o["id"])
+            collections = self.sorted_collections[api_root]
         # Remove data that is not part of the response.
-        for collection in collections:
-            collection.pop("manifest", None)
-            collection.pop("responses", None)
-            collection.pop("objects", None)
-        # interop wants results sorted by id
-        if get_application_instance_config_values(APPLICATION_INSTANCE, "taxii", "interop_requirements"):
-            collections = sorted(collections, key=lambda o: o["id"])
+        collections = [collection_metadata(c) for c in collections]
         return create_resource("collections", collections)
 
     def get_collection(self, api_root, collection_id):
         if api_root not in self.data:
             return None  # must return None so 404 is raised
 
-        api_info = self._get(api_root)
-        collections = copy.deepcopy(api_info.get("collections", []))
-
-        for collection in collections:
-            if collection_id == collection["id"]:
-                collection.pop("manifest", None)
-                collection.pop("responses", None)
-                collection.pop("objects", None)
-                return collection
+        collection = self._get_collection(api_root, collection_id)
+        if collection is not None:
+            return collection_metadata(collection)
 
     def get_object_manifest(self, api_root, collection_id, filter_args, allowed_filters, limit):
         more = False
         n = None
         if api_root in self.data:
-            api_info = self._get(api_root)
-            collections = api_info.get("collections", [])
-
-            for collection in collections:
-                if collection_id == collection["id"]:
-                    if "next" in filter_args:
-                        manifest = collection.get("manifest", [])
-                        manifest, more, headers, n = self.get_next(filter_args, allowed_filters, manifest, limit)
-                    else:
-                        manifest = collection.get("manifest", [])
-                        full_filter = BasicFilter(filter_args)
-                        manifest, next_save, headers = full_filter.process_filter(
-                            manifest,
-                            allowed_filters,
-                            None,
-                            limit
-                        )
-                        if len(next_save) != 0:
-                            more = True
-                            n = self.set_next(next_save, filter_args)
-                        break
+            collection = self._get_collection(api_root, collection_id)
+            if collection is not None:
+                manifest = collection.get("manifest", [])
+                if "next" in filter_args:
+                    manifest, more, headers, n = self.get_next(filter_args, allowed_filters, self._get_manifest_index(api_root, collection), limit)
+                else:
+                    full_filter = BasicFilter(filter_args)
+                    manifest, next_save, headers = full_filter.process_filter(
+                        manifest,
+                        allowed_filters,
+                        None,
+                        limit
+                    )
+                    if len(next_save) != 0:
+                        more = True
+                        n = self.set_next(next_save, filter_args)
             return create_resource("objects", manifest, more, n), headers
 
     def get_api_root_information(self, api_root):
         if api_root in self.data:
-            api_info = self._get(api_root)
+            api_info = self.data[api_root]
 
             if "information" in api_info:
                 return api_info["information"]
 
     def _get_api_root_statuses(self, api_root):
-        api_info = self._get(api_root)
+        api_info = self.data[api_root]
 
         if "status" in api_info:
             return api_info["status"]
 
     def get_status(self, api_root, status_id):
         if api_root in self.data:
-            api_info = self._get(api_root)
+            api_info = self.data[api_root]
 
             for status in api_info.get("status", []):
                 if status_id == status["id"]:
@@ -295,84 +413,82 @@ class MemoryBackend(Backend):
         more = False
         n = None
         if api_root in self.data:
-            api_info = self._get(api_root)
-            collections = api_info.get("collections", [])
             objs = []
-            for collection in collections:
-                if collection_id == collection["id"]:
-                    manifest = collection.get("manifest", [])
-                    if "next" in filter_args:
-                        objs, more, headers, n = self.get_next(filter_args, allowed_filters, manifest, limit)
-                    else:
-                        objs = copy.deepcopy(collection.get("objects", []))
-                        full_filter = BasicFilter(filter_args)
-                        objs, next_save, headers = full_filter.process_filter(
-                            objs,
-                            allowed_filters,
-                            manifest,
-                            limit
-                        )
-
-                        if len(next_save) != 0:
-                            more = True
-                            n = self.set_next(next_save, filter_args)
-                        break
-            remove_hidden_field(objs)
-            return create_resource("objects", objs, more, n), headers
+            collection = self._get_collection(api_root, collection_id)
+            if collection is not None:
+                manifest = collection.get("manifest", [])
+                if "next" in filter_args:
+                    objs, more, headers, n = self.get_next(filter_args, allowed_filters, self._get_manifest_index(api_root, collection), limit)
+                else:
+                    objs = list(collection.get("objects", []))
+                    full_filter = BasicFilter(filter_args)
+                    objs, next_save, headers = full_filter.process_filter(
+                        objs,
+                        allowed_filters,
+                        manifest,
+                        limit
+                    )
+
+                    if len(next_save) != 0:
+                        more = True
+                        n = self.set_next(next_save, filter_args)
+            return create_resource("objects", without_hidden_field(objs), more, n), headers
 
     def _add_status(self, api_root_name, status):
         self._get_api_root_statuses(api_root_name).append(status)
 
     def add_objects(self, api_root, collection_id, objs, request_time):
         if api_root in self.data:
-            api_info = self._get(api_root)
-            collections = api_info.get("collections", [])
+            api_info = self.data[api_root]
             failed = 0
             succeeded = 0
             pending = 0
             successes = []
             failures = []
 
-            for collection in collections:
-                if collection_id == collection["id"]:
-                    if "objects" not in collection:
-                        collection["objects"] = []
-                    try:
-                        for new_obj in objs["objects"]:
-                            version = determine_version(new_obj, request_time)
+            collection = self._get_collection(api_root, collection_id)
+            if collection is not None:
+                if "objects" not in collection:
+                    collection["objects"] = []
+                try:
+                    date_added = datetime_to_string(request_time)
+                    known_media_types = set(collection["media_types"])
+                    object_index = self._get_object_index(api_root, collection)
+                    for new_obj in objs["objects"]:
+                        version = determine_version(new_obj, request_time)
+                        present = object_index.get(new_obj["id"])
+                        if not present:
                             id_and_version_already_present = False
-                            for obj in collection["objects"]:
-                                if new_obj["id"] == obj["id"]:
-                                    if "modified" in new_obj:
-                                        if new_obj["modified"] == obj["modified"]:
-                                            id_and_version_already_present = True
-                                            break
-                                    else:
-                                        # There is no modified field, so this object is immutable
-                                        id_and_version_already_present = True
-                                        break
-
-                            if id_and_version_already_present:
-                                message = "Object already added"
-
-                            else:
-                                message = None
-                                if "modified" not in new_obj and "created" not in new_obj:
-                                    new_obj["_date_added"] = version
-                                collection["objects"].append(new_obj)
-                                self._update_manifest(new_obj, api_root, collection["id"], request_time)
-
-                            # else: we already have the object, so this is a
-                            # no-op.
-
-                            status_details = generate_status_details(
-                                new_obj["id"], version, message
+                        elif "modified" in new_obj:
+                            id_and_version_already_present = any(
+                                new_obj["modified"] == obj.get("modified") for obj in present
                             )
-                            successes.append(status_details)
-                            succeeded += 1
+                        else:
+                            # There is no modified field, so this object is immutable
+                            id_and_version_already_present = True
+
+                        if id_and_version_already_present:
+                            message = "Object already added"
+
+                        else:
+                            message = None
+                            if "modified" not in new_obj and "created" not in new_obj:
+                                new_obj["_date_added"] = version
+                            collection["objects"].append(new_obj)
+                            object_index.setdefault(new_obj["id"], []).append(new_obj)
+                            self._update_manifest(new_obj, api_root, collection, date_added, version, known_media_types)
+
+                        # else: we already have the object, so this is a
+                        # no-op.
+
+                        status_details = generate_status_details(
+                            new_obj["id"], version, message
+                        )
+                        successes.append(status_details)
+                        succeeded += 1
 
-                    except Exception as e:
-                        raise ProcessingError("While processing supplied content, an error occurred", 422, e)
+                except Exception as e:
+                    raise ProcessingError("While processing supplied content, an error occurred", 422, e)
 
             status = generate_status(
                 datetime_to_string(request_time), "complete", succeeded,
@@ -386,49 +502,37 @@ class MemoryBackend(Backend):
         more = False
         n = None
         if api_root in self.data:
-            api_info = self._get(api_root)
-            collections = api_info.get("collections", [])
             objs = []
-            manifests = []
-            for collection in collections:
-                if collection_id == collection["id"]:
-                    manifests = collection.get("manifest", [])
-                    if "next" in filter_args:
-                        objs, more, headers, n = self.get_next(filter_args, allowed_filters, manifests, limit)
-                    else:
-                        for obj in collection.get("objects", []):
-                            if object_id == obj["id"]:
-                                objs.append(copy.deepcopy(obj))
-                        if len(objs) == 0:
-                            raise ProcessingError("Object '{}' not found".format(object_id), 404)
-                        full_filter = BasicFilter(filter_args)
-                        objs, next_save, headers = full_filter.process_filter(
-                            objs,
-                            allowed_filters,
-                            manifests,
-                            limit
-                        )
-                        if len(next_save) != 0:
-                            more = True
-                            n = self.set_next(next_save, filter_args)
-                        break
-            remove_hidden_field(objs)
-            return create_resource("objects", objs, more, n), headers
+            collection = self._get_collection(api_root, collection_id)
+            if collection is not None:
+                manifests = collection.get("manifest", [])
+                if "next" in filter_args:
+                    objs, more, headers, n = self.get_next(filter_args, allowed_filters, self._get_manifest_index(api_root, collection), limit)
+                else:
+                    objs = list(self._get_object_index(api_root, collection).get(object_id, []))
+                    if len(objs) == 0:
+                        raise ProcessingError("Object '{}' not found".format(object_id), 404)
+                    full_filter = BasicFilter(filter_args)
+                    objs, next_save, headers = full_filter.process_filter(
+                        objs,
+                        allowed_filters,
+                        manifests,
+                        limit
+                    )
+                    if len(next_save) != 0:
+                        more = True
+                        n = self.set_next(next_save, filter_args)
+            return create_resource("objects", without_hidden_field(objs), more, n), headers
 
     def delete_object(self, api_root, collection_id, obj_id, filter_args, allowed_filters):
         if api_root in self.data:
-            api_info = self._get(api_root)
-            collections = api_info.get("collections", [])
             objs = []
             manifests = []
-            for collection in collections:
-                if "id" in collection and collection_id == collection["id"]:
-                    coll = collection.get("objects", [])
-                    for obj in coll:
-                        if obj_id == obj["id"]:
-                            objs.append(obj)
-                    manifests = collection.get("manifest", [])
-                    break
+            collection = self._get_collection(api_root, collection_id)
+            if collection is not None:
+                coll = collection.get("objects", [])
+                objs = list(self._get_object_index(api_root, collection).get(obj_id, []))
+                manifests = collection.get("manifest", [])
 
             full_filter = BasicFilter(filter_args)
             objs, nex, headers = full_filter.process_filter(
@@ -441,47 +545,49 @@ class MemoryBackend(Backend):
             if len(objs) == 0:
                 raise ProcessingError("Object '{}' not found".format(obj_id), 404)
 
+            # the filter returns the stored objects themselves, so they (and
+            # their manifest entries) are removed by identity in a single pass
+            object_index = self._get_object_index(api_root, collection)
+            manifest_index = self._get_manifest_index(api_root, collection)
+            deleted_objs = set(id(obj) for obj in objs)
+            deleted_mans = set()
             for obj in objs:
-                if obj in coll:
-                    coll.remove(obj)
-                    obj_time = find_att(obj)
-                    for man in manifests:
-                        if obj["id"] == man["id"] and obj_time == find_att(man):
-                            manifests.remove(man)
-                            break
+                obj_time = find_att(obj)
+                for man in manifest_index.get(obj_id, []):
+                    if id(man) not in deleted_mans and obj_time == find_att(man):
+                        deleted_mans.add(id(man))
+                        break
+
+            coll[:] = [obj for obj in coll if id(obj) not in deleted_objs]
+            manifests[:] = [man for man in manifests if id(man) not in deleted_mans]
+            object_index[obj_id] = [obj for obj in object_index[obj_id] if id(obj) not in deleted_objs]
+            manifest_index[obj_id] = [man for man in manifest_index.get(obj_id, []) if id(man) not in deleted_mans]
 
     def get_object_versions(self, api_root, collection_id, object_id, filter_args, allowed_filters, limit):
         more = False
         n = None
         if api_root in self.data:
-            api_info = self._get(api_root)
-            collections = api_info.get("collections", [])
-
             objs = []
-            for collection in collections:
-                if collection_id == collection["id"]:
-                    all_manifests = collection.get("manifest", [])
-                    if "next" in filter_args:
-                        objs, more, headers, n = self.get_next(filter_args, allowed_filters, all_manifests, limit)
-                        objs = sorted(map(lambda x: x["version"], objs), reverse=True)
-                    else:
-
-                        all_manifests = collection.get("manifest", [])
-                        for manifest in all_manifests:
-                            if object_id == manifest["id"]:
-                                objs.append(manifest)
-                        if len(objs) == 0:
-                            raise ProcessingError("Object '{}' not found".format(object_id), 404)
-                        full_filter = BasicFilter(filter_args)
-                        objs, next_save, headers = full_filter.process_filter(
-                            objs,
-                            allowed_filters,
-                            None,
-                            limit
-                        )
-                        if len(next_save) != 0:
-                            more = True
-                            n = self.set_next(next_save, filter_args)
-                        objs = sorted(map(lambda x: x["version"], objs), reverse=True)
-                        break
+            collection = self._get_collection(api_root, collection_id)
+            if collection is not None:
+                if "next" in filter_args:
+                    objs, more, headers, n = self.get_next(filter_args, allowed_filters, self._get_manifest_index(api_root, collection), limit)
+                    objs = sorted((x["version"] for x in objs), reverse=True)
+                else:
+                    # the filter only reorders the list it is given, which
+                    # does not matter for the index, so no copy is made
+                    objs = self._get_manifest_index(api_root, collection).get(object_id, [])
+                    if len(objs) == 0:
+                        raise ProcessingError("Object '{}' not found".format(object_id), 404)
+                    full_filter = BasicFilter(filter_args)
+                    objs, next_save, headers = full_filter.process_filter(
+                        objs,
+                        allowed_filters,
+                        None,
+                        limit
+                    )
+                    if len(next_save) != 0:
+                        more = True
+                        n = self.set_next(next_save, filter_args)
+                    objs = sorted((x["version"] for x in objs), reverse=True)
             return create_resource("versions", objs, more, n), headers
@@ -1,32 +1,80 @@
+import collections
+import copy
 import io
 import json
 import logging
+import time
 import uuid
 
 import environ
-from pymongo import ASCENDING, IndexModel, MongoClient
+from pymongo import ASCENDING, IndexModel, MongoClient, WriteConcern
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from six import string_types
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # from ..config import get_application_instance_config_values
 from ..common import (
-    APPLICATION_INSTANCE, create_resource, datetime_to_float,
-    datetime_to_string, datetime_to_string_stix, determine_spec_version,
-    determine_version, float_to_datetime, generate_status,
-    generate_status_details, get_application_instance_config_values,
-    get_custom_headers, get_timestamp, parse_request_parameters,
-    string_to_datetime
+    create_resource, datetime_to_float, datetime_to_string,
+    datetime_to_string_stix, determine_spec_version, determine_version,
+    float_to_datetime, generate_status, generate_status_details,
+    get_custom_headers, get_timestamp, has_long_number,
+    media_type_for_spec_version, parse_request_parameters, string_to_datetime
 )
 from ..exceptions import (
     InitializationError, MongoBackendError, ProcessingError
 )
 from ..filters.mongodb_filter import MongoDBFilter
-from .base import Backend
+from .base import Backend, get_api_root_name
 
 # Module-level logger
 log = logging.getLogger(__name__)
 
 
+# status documents are only kept for the status retention period, so their
+# writes are acknowledged by the primary without waiting for the journal
+STATUS_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+# options of the mongodb collections that don't use the client's defaults
+COLLECTION_OPTIONS = {
+    "status": {"write_concern": STATUS_WRITE_CONCERN},
+}
+
+# indexes of the "objects" mongodb collection of each api root
+OBJECTS_INDEXES = [
+    IndexModel([("id", ASCENDING)]),
+    IndexModel([("type", ASCENDING)]),
+    IndexModel([("_manifest.date_added", ASCENDING)]),
+    IndexModel([("_manifest.version", ASCENDING)]),
+    IndexModel([("_collection_id", ASCENDING)]),
+    IndexModel([("_manifest.media_type", ASCENDING), ("_manifest.date_added", ASCENDING)]),
+    IndexModel([("_manifest.media_type", ASCENDING), ("_manifest.version", ASCENDING)]),
+    IndexModel([("_collection_id", ASCENDING), ("_manifest.date_added", ASCENDING)]),
+    # single object lookups (get_object, delete_object, duplicate checks in add_objects)
+    IndexModel([("_collection_id", ASCENDING), ("id", ASCENDING), ("_manifest.version", ASCENDING)]),
+]
+
+# clients shared by every backend using the same server and pool settings,
+# since each MongoClient keeps its own connection pool
+_CLIENTS = {}
+
+
+def get_mongo_client(uri, max_pool_size=100, min_pool_size=0, server_selection_timeout=30000):
+    """Return the MongoClient for ``uri``, creating it on first use."""
+    key = (uri, max_pool_size, min_pool_size, server_selection_timeout)
+    if key not in _CLIENTS:
+        _CLIENTS[key] = MongoClient(
+            uri,
+            maxPoolSize=max_pool_size,
+            minPoolSize=min_pool_size,
+            serverSelectionTimeoutMS=server_selection_timeout,
+        )
+    return _CLIENTS[key]
+
+
 def catch_mongodb_error(func):
     """Catch mongodb availability error"""
 
@@ -51,6 +99,16 @@ def find_manifest_entries_for_id(obj, manifest):
                     return m
 
 
+def date_added_headers(timestamps):
+    """Generates the X-TAXII-Date-Added headers from the date_added
+    timestamps of the returned objects"""
+    headers = {}
+    if timestamps:
+        headers["X-TAXII-Date-Added-First"] = datetime_to_string(float_to_datetime(min(timestamps)))
+        headers["X-TAXII-Date-Added-Last"] = datetime_to_string(float_to_datetime(max(timestamps)))
+    return headers
+
+
 class MongoBackend(Backend):
 
     # access control is handled at the views level
@@ -62,8 +120,27 @@ class MongoBackend(Backend):
     def __init__(self, **kwargs):
         try:
 
-            self.pages = {}
-            self.client = MongoClient(kwargs.get("uri"))
+            # pagination records, least recently used first
+            self.pages = collections.OrderedDict()
+            self.max_sessions = kwargs.get("max_sessions", 1024)
+            # mongodb collection handles, keyed by (database, collection name)
+            self.handles = {}
+            # discovery, api root and collection documents, which rarely
+            # change, are kept for a short while: key -> (expiry, document)
+            self.metadata_cache = {}
+            self.metadata_cache_ttl = kwargs.get("metadata_cache_ttl", 30)
+            # statuses returned by add_objects, oldest first, so polling a
+            # status right after adding objects doesn't need a query. This
+            # cache is per process: a status deleted by another process's
+            # _pop_old_statuses stays here until it is evicted
+            self.recent_statuses = collections.OrderedDict()
+            self.max_recent_statuses = kwargs.get("max_recent_statuses", 1024)
+            self.client = get_mongo_client(
+                kwargs.get("uri"),
+                max_pool_size=kwargs.get("max_pool_size", 100),
+                min_pool_size=kwargs.get("min_pool_size", 0),
+                server_selection_timeout=kwargs.get("server_selection_timeout", 30000),
+            )
 
             # unless clearing the db has been explicitly specified, don't initialize if the discovery_database exits
             # the discovery_databases is a minimally viable database,
@@ -85,12 +162,37 @@ class MongoBackend(Backend):
         """
         return "discovery_database" in self.client.list_database_names()
 
+    def _handle(self, database, name):
+        key = (database, name)
+        if key not in self.handles:
+            self.handles[key] = self.client[database].get_collection(name, **COLLECTION_OPTIONS.get(name, {}))
+        return self.handles[key]
+
+    def _cached(self, key, load):
+        now = time.monotonic()
+        entry = self.metadata_cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+        value = load()
+        # documents that were not found are not kept, so unknown names can't fill the cache
+        if value:
+            self.metadata_cache[key] = (now + self.metadata_cache_ttl, value)
+        return value
+
+    def _database_names(self):
+        # databases are only created and dropped when the backend
+        # (re)initializes them, so the list is cached like the metadata
+        return self._cached(("databases",), lambda: set(self.client.list_database_names()))
+
     def _process_params(self, filter_args, limit):
         next_id = filter_args.get("next")
         if limit and next_id is None:
             client_params = parse_request_parameters(filter_args)
             record = {"skip": 0, "limit": limit, "args": client_params, "request_time": datetime_to_float(get_timestamp())}
             next_id = str(uuid.uuid4())
+            # drop the least recently used records so abandoned paginations don't pile up
+            while self.pages and len(self.pages) >= self.max_sessions:
+                self.pages.popitem(last=False)
             self.pages[next_id] = record
         elif limit and next_id:
             if next_id not in self.pages:
@@ -100,16 +202,16 @@ class MongoBackend(Backend):
                 raise ProcessingError("The server did not understand the request or filter parameters: params changed over subsequent transaction", 400)
             self.pages[next_id]["limit"] = limit
             self.pages[next_id]["request_time"] = datetime_to_float(get_timestamp())
+            self.pages.move_to_end(next_id)
             record = self.pages[next_id]
         else:
             record = {}
         return next_id, record
 
-    def _update_record(self, next_id, count, internal=False):
+    def _update_record(self, next_id, count):
         more = False
         if next_id:
-            if internal is False:
-                self.pages[next_id]["skip"] += self.pages[next_id]["limit"]
+            self.pages[next_id]["skip"] += self.pages[next_id]["limit"]
             if self.pages[next_id]["skip"] >= count:
                 self.pages.pop(next_id, None)
                 next_id = None
@@ -118,28 +220,30 @@ class MongoBackend(Backend):
         return next_id, more
 
     def _validate_object_id(self, manifest_info, collection_id, object_id):
-        result = list(manifest_info.find({"_collection_id": collection_id, "id": object_id}).limit(1))
-        if len(result) == 0:
+        # answered from the (_collection_id, id, ...) index, without reading a document
+        if manifest_info.count_documents({"_collection_id": collection_id, "id": object_id}, limit=1) == 0:
             raise ProcessingError("Object '{}' not found".format(object_id), 404)
 
     def _pop_expired_sessions(self):
-        expired_ids = []
+        # records are kept in order of their last request, so the expired
+        # ones are all at the front
         boundary = datetime_to_float(get_timestamp())
-        for next_id, record in self.pages.items():
-            if boundary - record["request_time"] > self.timeout:
-                expired_ids.append(next_id)
-
-        for item in expired_ids:
-            self.pages.pop(item)
+        while self.pages:
+            next_id, record = next(iter(self.pages.items()))
+            if boundary - record["request_time"] <= self.timeout:
+                break
+            self.pages.pop(next_id, None)
 
     def _pop_old_statuses(self):
-        if "discovery_database" in self.client.list_database_names():
+        if "discovery_database" in self._database_names():
             api_roots = self._get_all_api_roots()
             if api_roots:
                 status_retention_in_milliseconds = self.status_retention * 1000
                 for ar in api_roots:
                     statuses_of_api_root = self._get_api_root_statuses(ar)
-                    result = statuses_of_api_root.aggregate([
+                    # request timestamps may be in any RFC 3339 form (e.g. from an
+                    # initialization file), so they are compared as dates
+                    expired = list(statuses_of_api_root.aggregate([
                             {
                                 "$project": {
                                     "id": 1,
@@ -163,14 +267,16 @@ class MongoBackend(Backend):
                                 }
                             }
                         ]
-                    )
-                    for doc in result:
+                    ))
+                    for doc in expired:
                         log.info("Status {} was deleted from {} because it was older than the status retention time".format(doc["id"], ar))
-                        statuses_of_api_root.delete_one({"_id": doc["_id"]})
+                    if expired:
+                        statuses_of_api_root.delete_many({"_id": {"$in": [doc["_id"] for doc in expired]}})
+                        for doc in expired:
+                            self.recent_statuses.pop((ar, doc["id"]), None)
 
-    def _get_object_manifest(self, api_root, collection_id, filter_args, allowed_filters, limit, internal=False):
-        api_root_db = self.client[api_root]
-        objects_info = api_root_db["objects"]
+    def _get_object_manifest(self, api_root, collection_id, filter_args, allowed_filters, limit):
+        objects_info = self._handle(api_root, "objects")
         next_id, record = self._process_params(filter_args, limit)
 
         full_filter = MongoDBFilter(
@@ -189,13 +295,10 @@ class MongoBackend(Backend):
             obj["date_added"] = datetime_to_string(float_to_datetime(obj["date_added"]))
             obj["version"] = datetime_to_string_stix(float_to_datetime(obj["version"]))
 
-        next_id, more = self._update_record(next_id, count, internal)
+        next_id, more = self._update_record(next_id, count)
         manifest_resource = create_resource("objects", objects_found, more, next_id)
-        if internal:
-            return manifest_resource
-        else:
-            headers = get_custom_headers(manifest_resource)
-            return manifest_resource, headers
+        headers = get_custom_headers(manifest_resource)
+        return manifest_resource, headers
 
     def object_manifest_check(self):
         """
@@ -210,89 +313,90 @@ class MongoBackend(Backend):
             objects_exists = True
             api_root_db = db[api_root]
             objects = api_root_db["objects"]
-            for result in objects.find({}):
-                if "_manifest" not in result:
-                    field_to_use = 'created'
-                    if "modified" in result:
-                        field_to_use = 'modified'
-                    raise InitializationError("Object {} from {} is missing a manifest".format(result['id'], result[field_to_use]), 408)
-                if not result['_manifest']:
-                    field_to_use = 'created'
-                    if "modified" in result:
-                        field_to_use = 'modified'
-                    raise InitializationError("Object {} from {} has a null manifest".format(result['id'], result[field_to_use]), 408)
+            # only look up offending objects, and only the fields the error needs
+            projection = {"_id": 0, "id": 1, "created": 1, "modified": 1}
+            result = objects.find_one({"_manifest": {"$exists": False}}, projection)
+            if result:
+                field_to_use = 'created'
+                if "modified" in result:
+                    field_to_use = 'modified'
+                raise InitializationError("Object {} from {} is missing a manifest".format(result['id'], result[field_to_use]), 408)
+            # a manifest Python treats as false; $in on its own would also
+            # match the elements of (non-empty) arrays, so those are only
+            # matched when empty
+            result = objects.find_one({"$or": [
+                {"_manifest": {"$in": [None, False, 0, "", {}], "$not": {"$type": "array"}}},
+                {"_manifest": {"$size": 0}},
+            ]}, projection)
+            if result:
+                field_to_use = 'created'
+                if "modified" in result:
+                    field_to_use = 'modified'
+                raise InitializationError("Object {} from {} has a null manifest".format(result['id'], result[field_to_use]), 408)
         if not objects_exists:
             raise InitializationError("Could not find any objects in database", 408)
 
     @catch_mongodb_error
-    def _update_manifest(self, api_root, collection_id, media_type):
-        api_root_db = self.client[api_root]
-        collection_info = api_root_db["collections"]
-
-        # update media_types in collection if a new one is present.
-        info = collection_info.find_one({"id": collection_id})
-        if media_type not in info["media_types"]:
-            info["media_types"].append(media_type)
-            collection_info.update_one(
-                {"id": collection_id},
-                {"$set": {"media_types": info["media_types"]}}
-            )
+    def _update_manifest(self, api_root, collection_id, media_types):
+        collection_info = self._handle(api_root, "collections")
+        self.metadata_cache.pop(("collection", api_root, collection_id), None)
+
+        # update media_types in collection if new ones are present;
+        # $addToSet skips the ones already listed, in a single round trip
+        collection_info.update_one(
+            {"id": collection_id},
+            {"$addToSet": {"media_types": {"$each": list(media_types)}}}
+        )
 
     @catch_mongodb_error
     def server_discovery(self):
-        discovery_db = self.client["discovery_database"]
-        discovery_info = discovery_db["discovery_information"]
-        info = discovery_info.find_one()
-        if info:
-            info.pop("_id")
-        return info
+        discovery_info = self._handle("discovery_database", "discovery_information")
+        return self._cached(("discovery",), lambda: discovery_info.find_one({}, {"_id": 0}))
 
     @catch_mongodb_error
     def get_collections(self, api_root):
-        if api_root not in self.client.list_database_names():
+        if api_root not in self._database_names():
             return None  # must return None, so 404 is raised
 
-        api_root_db = self.client[api_root]
-        collection_info = api_root_db["collections"]
-        collections = list(collection_info.find({}, {"_id": 0}))
-        # interop wants results sorted by id - no need to check for interop option
-        if get_application_instance_config_values(APPLICATION_INSTANCE, "taxii", "interop_requirements"):
-            collections = sorted(collections, key=lambda o: o["id"])
-        return create_resource("collections", collections)
+        collection_info = self._handle(api_root, "collections")
+        cursor = collection_info.find({}, {"_id": 0})
+        # interop wants results sorted by id - let the server sort them
+        if self.interop_requirements_enforced:
+            cursor = cursor.sort("id", ASCENDING)
+        return create_resource("collections", list(cursor))
 
     @catch_mongodb_error
     def get_collection(self, api_root, collection_id):
-        if api_root not in self.client.list_database_names():
-            return None  # must return None, so 404 is raised
+        def load():
+            if api_root not in self._database_names():
+                return None  # must return None, so 404 is raised
+
+            collection_info = self._handle(api_root, "collections")
+            return collection_info.find_one({"id": collection_id}, {"_id": 0})
 
-        api_root_db = self.client[api_root]
-        collection_info = api_root_db["collections"]
-        info = collection_info.find_one({"id": collection_id}, {"_id": 0})
-        return info
+        return self._cached(("collection", api_root, collection_id), load)
 
     @catch_mongodb_error
     def get_object_manifest(self, api_root, collection_id, filter_args, allowed_filters, limit):
-        return self._get_object_manifest(api_root, collection_id, filter_args, allowed_filters, limit, False)
+        return self._get_object_manifest(api_root, collection_id, filter_args, allowed_filters, limit)
 
     @catch_mongodb_error
     def get_api_root_information(self, api_root_name):
-        db = self.client["discovery_database"]
-        api_root_info = db["api_root_info"]
-        info = api_root_info.find_one(
+        api_root_info = self._handle("discovery_database", "api_root_info")
+        return self._cached(("api_root", api_root_name), lambda: api_root_info.find_one(
             {"_name": api_root_name},
             {"_id": 0, "_url": 0, "_name": 0}
-        )
-        return info
+        ))
 
     @catch_mongodb_error
     def _get_api_root_statuses(self, api_root):
-        api_root_db = self.client[api_root]
-        return api_root_db["status"]
+        return self._handle(api_root, "status")
 
     @catch_mongodb_error
     def get_status(self, api_root, status_id):
-        api_root_db = self.client[api_root]
-        status_info = api_root_db["status"]
+        status_info = self._handle(api_root, "status")
+        if (api_root, status_id) in self.recent_statuses:
+            return copy.deepcopy(self.recent_statuses[(api_root, status_id)])
         result = status_info.find_one(
             {"id": status_id},
             {"_id": 0}
@@ -301,8 +405,7 @@ class MongoBackend(Backend):
 
     @catch_mongodb_error
     def get_objects(self, api_root, collection_id, filter_args, allowed_filters, limit):
-        api_root_db = self.client[api_root]
-        objects_info = api_root_db["objects"]
+        objects_info = self._handle(api_root, "objects")
         next_id, record = self._process_params(filter_args, limit)
 
         full_filter = MongoDBFilter(
@@ -319,41 +422,57 @@ class MongoBackend(Backend):
             "objects"
         )
 
+        date_added = []
         for obj in objects_found:
+            date_added.append(obj.pop("_date_added"))
             if "modified" in obj:
                 obj["modified"] = datetime_to_string_stix(float_to_datetime(obj["modified"]))
             if "created" in obj:
                 obj["created"] = datetime_to_string_stix(float_to_datetime(obj["created"]))
-
-        manifest_resource = self._get_object_manifest(api_root, collection_id, filter_args, allowed_filters, limit, True)
-        headers = get_custom_headers(manifest_resource)
+        headers = date_added_headers(date_added)
 
         next_id, more = self._update_record(next_id, count)
         return create_resource("objects", objects_found, more, next_id), headers
 
     @catch_mongodb_error
     def _add_status(self, api_root_name, status):
-        api_root_db = self.client[api_root_name]
-        api_root_db["status"].insert_one(status)
+        self._handle(api_root_name, "status").insert_one(status)
 
     @catch_mongodb_error
     def add_objects(self, api_root, collection_id, objs, request_time):
-        api_root_db = self.client[api_root]
-        objects_info = api_root_db["objects"]
+        objects_info = self._handle(api_root, "objects")
         failed = 0
         succeeded = 0
         pending = 0
         successes = []
         failures = []
-        media_fmt = "application/stix+json;version={}"
+        date_added = datetime_to_float(request_time)
 
         try:
+            # look up every object of the bundle that is already stored in a
+            # single query: by (id, media type, version) for versioned objects
+            # and by (id, media type) for the ones without "modified"
+            existing_versions = set()
+            existing_ids = set()
+            stored = objects_info.find(
+                {"_collection_id": collection_id, "id": {"$in": [obj["id"] for obj in objs["objects"]]}},
+                {"_id": 0, "id": 1, "_manifest.media_type": 1, "_manifest.version": 1},
+            )
+            for entry in stored:
+                manifest = entry.get("_manifest", {})
+                existing_versions.add((entry["id"], manifest.get("media_type"), manifest.get("version")))
+                existing_ids.add((entry["id"], manifest.get("media_type")))
+
+            new_objs = []
+            new_media_types = {}
             for new_obj in objs["objects"]:
-                media_type = media_fmt.format(determine_spec_version(new_obj))
-                mongo_query = {"_collection_id": collection_id, "id": new_obj["id"], "_manifest.media_type": media_type}
+                media_type = media_type_for_spec_version(determine_spec_version(new_obj))
                 if "modified" in new_obj:
-                    mongo_query["_manifest.version"] = datetime_to_float(string_to_datetime(new_obj["modified"]))
-                existing_entry = objects_info.find_one(mongo_query)
+                    existing_entry = (
+                        new_obj["id"], media_type, datetime_to_float(string_to_datetime(new_obj["modified"]))
+                    ) in existing_versions
+                else:
+                    existing_entry = (new_obj["id"], media_type) in existing_ids
                 obj_version = determine_version(new_obj, request_time)
 
                 if existing_entry:
@@ -368,13 +487,16 @@ class MongoBackend(Backend):
                         new_obj["created"] = datetime_to_float(string_to_datetime(new_obj["created"]))
                     _manifest = {
                         "id": new_obj["id"],
-                        "date_added": datetime_to_float(request_time),
+                        "date_added": date_added,
                         "version": datetime_to_float(string_to_datetime(obj_version)),
                         "media_type": media_type,
                     }
                     new_obj.update({"_manifest": _manifest})
-                    objects_info.insert_one(new_obj)
-                    self._update_manifest(api_root, collection_id, media_type)
+                    new_objs.append(new_obj)
+                    new_media_types[media_type] = None
+                    # later copies of this object in the same bundle are duplicates
+                    existing_versions.add((new_obj["id"], media_type, _manifest["version"]))
+                    existing_ids.add((new_obj["id"], media_type))
 
                 # else: we already have the object, so this is a
                 # no-op.
@@ -384,6 +506,10 @@ class MongoBackend(Backend):
                 )
                 successes.append(status_detail)
                 succeeded += 1
+
+            if new_objs:
+                objects_info.insert_many(new_objs, ordered=False)
+                self._update_manifest(api_root, collection_id, new_media_types)
         except Exception as e:
             # log.exception(e)
             raise ProcessingError("While processing supplied content, an error occurred", 422, e)
@@ -392,20 +518,21 @@ class MongoBackend(Backend):
             datetime_to_string(request_time), "complete", succeeded, failed,
             pending, successes=successes, failures=failures,
         )
-        api_root_db["status"].insert_one(status)
+        self._handle(api_root, "status").insert_one(status)
         status.pop("_id", None)
+        while self.recent_statuses and len(self.recent_statuses) >= self.max_recent_statuses:
+            self.recent_statuses.popitem(last=False)
+        # callers get their own copy, so changes to the response can't reach the cache
+        self.recent_statuses[(api_root, status["id"])] = copy.deepcopy(status)
         return status
 
     @catch_mongodb_error
     def get_object(self, api_root, collection_id, object_id, filter_args, allowed_filters, limit):
-        api_root_db = self.client[api_root]
-        objects_info = api_root_db["objects"]
+        objects_info = self._handle(api_root, "objects")
         # set manually to properly retrieve manifests, and early to not break the pagination checks
         filter_args["match[id]"] = object_id
         next_id, record = self._process_params(filter_args, limit)
 
-        self._validate_object_id(objects_info, collection_id, object_id)
-
         full_filter = MongoDBFilter(
             filter_args,
             {"_collection_id": {"$eq": collection_id}, "id": {"$eq": object_id}},
@@ -417,25 +544,25 @@ class MongoBackend(Backend):
             allowed_filters,
             "objects"
         )
+        if not objects_found:
+            # tell a missing object apart from filters that matched no version
+            self._validate_object_id(objects_info, collection_id, object_id)
 
+        date_added = []
         for obj in objects_found:
+            date_added.append(obj.pop("_date_added"))
             if "modified" in obj:
                 obj["modified"] = datetime_to_string_stix(float_to_datetime(obj["modified"]))
             if "created" in obj:
                 obj["created"] = datetime_to_string_stix(float_to_datetime(obj["created"]))
-
-        manifest_resource = self._get_object_manifest(api_root, collection_id, filter_args, ("id", "type", "version", "spec_version"), limit, True)
-        headers = get_custom_headers(manifest_resource)
+        headers = date_added_headers(date_added)
 
         next_id, more = self._update_record(next_id, count)
         return create_resource("objects", objects_found, more, next_id), headers
 
     @catch_mongodb_error
     def delete_object(self, api_root, collection_id, object_id, filter_args, allowed_filters):
-        api_root_db = self.client[api_root]
-        objects_info = api_root_db["objects"]
-
-        self._validate_object_id(objects_info, collection_id, object_id)
+        objects_info = self._handle(api_root, "objects")
 
         # Currently it will delete the object and the matching manifest from the backend
         full_filter = MongoDBFilter(
@@ -449,25 +576,22 @@ class MongoBackend(Backend):
             "raw"
         )
         if objects_found:
-            for obj in objects_found:
-                obj_version = obj["_manifest"]["version"]
-                objects_info.delete_one(
-                    {"_collection_id": collection_id, "id": object_id, "_manifest.version": obj_version}
-                )
+            objects_info.delete_many({
+                "_collection_id": collection_id,
+                "id": object_id,
+                "_manifest.version": {"$in": [obj["_manifest"]["version"] for obj in objects_found]},
+            })
         else:
             raise ProcessingError("Object '{}' not found".format(object_id), 404)
 
     @catch_mongodb_error
     def get_object_versions(self, api_root, collection_id, object_id, filter_args, allowed_filters, limit):
-        api_root_db = self.client[api_root]
-        objects_info = api_root_db["objects"]
+        objects_info = self._handle(api_root, "objects")
         # set manually to properly retrieve manifests, and early to not break the pagination checks
         filter_args["match[id]"] = object_id
         filter_args["match[version]"] = "all"
         next_id, record = self._process_params(filter_args, limit)
 
-        self._validate_object_id(objects_info, collection_id, object_id)
-
         full_filter = MongoDBFilter(
             filter_args,
             {"_collection_id": {"$eq": collection_id}, "id": {"$eq": object_id}},
@@ -479,25 +603,36 @@ class MongoBackend(Backend):
             allowed_filters,
             "manifests",
         )
+        if not manifests_found:
+            # tell a missing object apart from filters that matched no version
+            self._validate_object_id(objects_info, collection_id, object_id)
 
-        manifest_resource = self._get_object_manifest(api_root, collection_id, filter_args, ("id", "type", "version", "spec_version"), limit, True)
-        headers = get_custom_headers(manifest_resource)
-
-        manifests_found = list(map(lambda x: datetime_to_string_stix(float_to_datetime(x["version"])), manifests_found))
+        headers = date_added_headers([x["date_added"] for x in manifests_found])
+        versions = [datetime_to_string_stix(float_to_datetime(x["version"])) for x in manifests_found]
         next_id, more = self._update_record(next_id, count)
-        return create_resource("versions", manifests_found, more, next_id), headers
+        return create_resource("versions", versions, more, next_id), headers
 
     def load_data_from_file(self, filename):
         try:
             if isinstance(filename, string_types):
-                with io.open(filename, "r", encoding="utf-8") as infile:
-                    self.json_data = json.load(infile)
+                with io.open(filename, "rb") as infile:
+                    self.json_data = self._load_json(infile)
             else:
-                self.json_data = json.load(filename)
+                self.json_data = self._load_json(filename)
         except Exception as e:
             raise InitializationError("Problem loading initialization data from {0}".format(filename), 408, e)
 
+    @staticmethod
+    def _load_json(infile):
+        # orjson accepts both str and bytes, so text and binary file objects work
+        data = infile.read()
+        if orjson and not has_long_number(data):
+            return orjson.loads(data)
+        return json.loads(data)
+
     def initialize_mongodb_with_data(self, filename):
+        self.metadata_cache = {}
+        self.recent_statuses.clear()
         self.load_data_from_file(filename)
         if "/discovery" in self.json_data:
             db = self.client["discovery_database"]
@@ -505,14 +640,20 @@ class MongoBackend(Backend):
         else:
             raise InitializationError("No discovery information provided when initializing the Mongo DB")
         api_root_info_db = db["api_root_info"]
+        # only api roots left over from a previous initialization need dropping
+        existing_databases = set(self.client.list_database_names())
+        api_root_urls = {get_api_root_name(url): url for url in self.json_data["/discovery"]["api_roots"]}
         for api_root_name, api_root_data in self.json_data.items():
             if api_root_name == "/discovery":
                 continue
-            url = list(filter(lambda a: api_root_name in a, self.json_data["/discovery"]["api_roots"]))[0]
+            url = api_root_urls.get(api_root_name)
+            if url is None:
+                url = list(filter(lambda a: api_root_name in a, self.json_data["/discovery"]["api_roots"]))[0]
             api_root_data["information"]["_url"] = url
             api_root_data["information"]["_name"] = api_root_name
             api_root_info_db.insert_one(api_root_data["information"])
-            self.client.drop_database(api_root_name)
+            if api_root_name in existing_databases:
+                self.client.drop_database(api_root_name)
             api_db = self.client[api_root_name]
             if api_root_data["status"]:
                 api_db["status"].insert_many(api_root_data["status"])
@@ -520,6 +661,10 @@ class MongoBackend(Backend):
                 api_db.create_collection("status")
             api_db.create_collection("collections")
             api_db.create_collection("objects")
+            # every document of the api root is prepared first and then
+            # written with one insert_many per mongodb collection
+            collection_docs = []
+            prepared = []
             for collection in api_root_data["collections"]:
                 collection_id = collection["id"]
                 objects = collection["objects"]
@@ -527,7 +672,7 @@ class MongoBackend(Backend):
                 # these are not in the collections mongodb collection (both TAXII and Mongo DB use the term collection)
                 collection.pop("objects")
                 collection.pop("manifest")
-                api_db["collections"].insert_one(collection)
+                collection_docs.append(collection)
                 for obj in objects:
                     obj["_collection_id"] = collection_id
                     obj["_manifest"] = find_manifest_entries_for_id(obj, manifest)
@@ -537,21 +682,20 @@ class MongoBackend(Backend):
                     if "modified" in obj:
                         # not for data markings
                         obj["modified"] = datetime_to_float(string_to_datetime(obj["modified"]))
-                    api_db["objects"].insert_one(obj)
-                id_index = IndexModel([("id", ASCENDING)])
-                type_index = IndexModel([("type", ASCENDING)])
-                collection_index = IndexModel([("_collection_id", ASCENDING)])
-                date_index = IndexModel([("_manifest.date_added", ASCENDING)])
-                version_index = IndexModel([("_manifest.version", ASCENDING)])
-                date_and_spec_index = IndexModel([("_manifest.media_type", ASCENDING), ("_manifest.date_added", ASCENDING)])
-                version_and_spec_index = IndexModel([("_manifest.media_type", ASCENDING), ("_manifest.version", ASCENDING)])
-                collection_and_date_index = IndexModel([("_collection_id", ASCENDING), ("_manifest.date_added", ASCENDING)])
-                api_db["objects"].create_indexes(
-                    [id_index, type_index, date_index, version_index, collection_index, date_and_spec_index,
-                     version_and_spec_index, collection_and_date_index]
-                )
+                    prepared.append(obj)
+            if collection_docs:
+                api_db["collections"].insert_many(collection_docs)
+            # get_collection looks collections up by id, get_collections sorts by it for interop
+            api_db["collections"].create_index([("id", ASCENDING)])
+            if prepared:
+                api_db["objects"].insert_many(prepared, ordered=False)
+            # built once the objects are in, so the inserts don't maintain them
+            api_db["objects"].create_indexes(OBJECTS_INDEXES)
+            api_db["status"].create_index([("id", ASCENDING)])
 
     def clear_db(self):
+        self.metadata_cache = {}
+        self.recent_statuses.clear()
         if "discovery_database" in self.client.list_database_names():
             log.info("Clearing database")
             self.client.drop_database("discovery_database")
@@ -1,5 +1,8 @@
 import calendar
 import datetime as dt
+import functools
+import re
+import sys
 import threading
 import uuid
 
@@ -7,8 +10,71 @@ from flask import Flask
 import pytz
 from six import iteritems
 
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:
+    # Flask < 2.2 has no pluggable JSON provider
+    DefaultJSONProvider = None
+
 APPLICATION_INSTANCE = Flask("medallion")
 
+# ciso8601 accepts more ISO 8601 forms than the strptime formats below, so it
+# is only used for timestamps in the exact form those formats accept
+STRICT_TIMESTAMP_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}T(?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d(?:\.\d{1,6})?Z\Z"
+)
+
+# orjson only handles 64-bit integers, and parses longer ones as floats.
+# Any number of 19 or more digits may not fit
+LONG_NUMBER_RE = re.compile(r"\d{19}")
+LONG_NUMBER_RE_BYTES = re.compile(rb"\d{19}")
+
+
+def has_long_number(s):
+    """Whether the JSON text ``s`` (str or bytes) may hold an integer orjson
+    can't decode exactly."""
+    long_number = LONG_NUMBER_RE_BYTES if isinstance(s, (bytes, bytearray)) else LONG_NUMBER_RE
+    return long_number.search(s) is not None
+
+
+if orjson and DefaultJSONProvider:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider which encodes and decodes with orjson. Calls
+        with extra keyword arguments (e.g. ``indent``), and data orjson can't
+        handle exactly, use the default provider."""
+
+        def dumps(self, obj, **kwargs):
+            if kwargs:
+                return super(OrjsonProvider, self).dumps(obj, **kwargs)
+            option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
+            except orjson.JSONEncodeError:
+                return super(OrjsonProvider, self).dumps(obj)
+
+        def loads(self, s, **kwargs):
+            if kwargs:
+                return super(OrjsonProvider, self).loads(s, **kwargs)
+            if has_long_number(s):
+                return super(OrjsonProvider, self).loads(s)
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                # e.g. NaN and Infinity, which the default provider accepts
+                return super(OrjsonProvider, self).loads(s)
+
+    APPLICATION_INSTANCE.json = OrjsonProvider(APPLICATION_INSTANCE)
+
 
 def create_resource(resource_name, items, more=False, next_id=None):
     """Generates a Resource Object given a resource name."""
@@ -29,6 +95,25 @@ def determine_version(new_obj, request_time):
     return new_obj.get("modified", new_obj.get("created", datetime_to_string(request_time)))
 
 
+MEDIA_TYPE_FORMAT = "application/stix+json;version={}"
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_media_type(spec_version):
+    return sys.intern(MEDIA_TYPE_FORMAT.format(spec_version))
+
+
+def media_type_for_spec_version(spec_version):
+    """Given a STIX spec version, return the STIX media type. There are only a
+    handful of spec versions, so the strings are cached (and interned, so they
+    are shared with media types loaded from data files)."""
+    try:
+        return _cached_media_type(spec_version)
+    except TypeError:
+        # unhashable values can't be cached, but are formatted all the same
+        return MEDIA_TYPE_FORMAT.format(spec_version)
+
+
 def determine_spec_version(obj):
     """Given a STIX 2.x object, determine its spec version."""
     missing = ("created", "modified")
@@ -47,6 +132,11 @@ def get(data, key):
             return item
 
 
+def _iter_list_items(lst):
+    for item in lst:
+        yield "[{0}]".format(lst.index(item)), item
+
+
 def iterpath(obj, path=None):
     """
     Generator which walks the input ``obj`` model. Each iteration yields a
@@ -70,30 +160,31 @@ def iterpath(obj, path=None):
     if path is None:
         path = []
 
-    for varname, varobj in iter(sorted(iteritems(obj))):
+    # Walk the model with an explicit stack of iterators instead of recursing.
+    # Each iterator yields (path component, value) pairs for one container,
+    # along with whether that container is a list (lists nested directly in
+    # lists are not descended into).
+    stack = [(iter(sorted(iteritems(obj))), False)]
+    while stack:
+        items, in_list = stack[-1]
+        entry = next(items, None)
+        if entry is None:
+            stack.pop()
+            if stack:
+                # done with the container stored under the last component
+                path.pop()
+            continue
+
+        varname, varobj = entry
         path.append(varname)
         yield (path, varobj)
 
         if isinstance(varobj, dict):
-
-            for item in iterpath(varobj, path):
-                yield item
-
-        elif isinstance(varobj, list):
-
-            for item in varobj:
-                index = "[{0}]".format(varobj.index(item))
-                path.append(index)
-
-                yield (path, item)
-
-                if isinstance(item, dict):
-                    for descendant in iterpath(item, path):
-                        yield descendant
-
-                path.pop()
-
-        path.pop()
+            stack.append((iter(sorted(iteritems(varobj))), False))
+        elif isinstance(varobj, list) and not in_list:
+            stack.append((_iter_list_items(varobj), True))
+        else:
+            path.pop()
 
 
 def get_timestamp():
@@ -104,39 +195,37 @@ def get_timestamp():
 def datetime_to_string(dttm):
     """Given a datetime instance, produce the string representation
     with microsecond precision"""
-    # 1. Convert to timezone-aware
-    # 2. Convert to UTC
-    # 3. Format in ISO format with microsecond precision
+    # 1. Convert to UTC, dropping the timezone info
+    # 2. Format in ISO format with microsecond precision (isoformat() is
+    #    considerably faster than strftime())
 
     if dttm.tzinfo is None or dttm.tzinfo.utcoffset(dttm) is None:
         # dttm is timezone-naive; assume UTC
-        zoned = pytz.UTC.localize(dttm)
+        zoned = dttm
     else:
-        zoned = dttm.astimezone(pytz.UTC)
-    return zoned.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        zoned = dttm.astimezone(pytz.UTC).replace(tzinfo=None)
+    return zoned.isoformat(timespec="microseconds") + "Z"
 
 
 def datetime_to_string_stix(dttm):
     """Given a datetime instance, produce the string representation
     with millisecond precision"""
-    # 1. Convert to timezone-aware
-    # 2. Convert to UTC
-    # 3. Format in ISO format with millisecond precision,
-    #       except for objects defined with higher precision
+    # 1. Convert to UTC, dropping the timezone info
+    # 2. Format in ISO format with microsecond precision (isoformat() is
+    #    considerably faster than strftime())
+    # 3. Trim to millisecond precision, except for objects defined with
+    #    higher precision
     # 4. Add "Z"
 
     if dttm.tzinfo is None or dttm.tzinfo.utcoffset(dttm) is None:
         # dttm is timezone-naive; assume UTC
-        zoned = pytz.UTC.localize(dttm)
-    else:
-        zoned = dttm.astimezone(pytz.UTC)
-    ts = zoned.strftime("%Y-%m-%dT%H:%M:%S")
-    ms = zoned.strftime("%f")
-    if len(ms[3:].rstrip("0")) >= 1:
-        ts = ts + "." + ms + "Z"
+        zoned = dttm
     else:
-        ts = ts + "." + ms[:3] + "Z"
-    return ts
+        zoned = dttm.astimezone(pytz.UTC).replace(tzinfo=None)
+    ts = zoned.isoformat(timespec="microseconds")
+    if ts.endswith("000"):
+        ts = ts[:-3]
+    return ts + "Z"
 
 
 def datetime_to_float(dttm):
@@ -153,8 +242,13 @@ def float_to_datetime(timestamp_float):
     return dt.datetime.utcfromtimestamp(timestamp_float)
 
 
+@functools.lru_cache(maxsize=4096)
 def string_to_datetime(timestamp_string):
-    """Convert string timestamp to datetime instance."""
+    """Convert string timestamp to datetime instance. The same timestamps are
+    converted over and over while filtering (see find_att), and datetime
+    instances are immutable, so results are cached."""
+    if ciso8601 and STRICT_TIMESTAMP_RE.match(timestamp_string):
+        return ciso8601.parse_datetime_as_naive(timestamp_string)
     try:
         return dt.datetime.strptime(timestamp_string, "%Y-%m-%dT%H:%M:%S.%fZ")
     except ValueError:
@@ -40,6 +40,15 @@ def check_version(data, relate):
     return res
 
 
+def group_by_id_and_version(data):
+    """Map each (id, version) pair to the list of objects or manifest entries
+    with that id and version, in their original order."""
+    groups = {}
+    for obj in data:
+        groups.setdefault((obj["id"], find_att(obj)), []).append(obj)
+    return groups
+
+
 class BasicFilter(object):
 
     def __init__(self, filter_args):
@@ -64,18 +73,17 @@ class BasicFilter(object):
             return new, next_save, headers
         if manifest:
             manifest.sort(key=lambda x: x['date_added'])
+            data_by_version = group_by_id_and_version(data)
             for man in manifest:
-                man_time = find_att(man)
-                for check in data:
-                    check_time = find_att(check)
-                    if check['id'] == man['id'] and check_time == man_time:
-                        if len(headers) == 0:
-                            headers["X-TAXII-Date-Added-First"] = man["date_added"]
-                        new.append(check)
-                        temp = man
-                        if len(new) == limit:
-                            headers["X-TAXII-Date-Added-Last"] = man["date_added"]
-                        break
+                matches = data_by_version.get((man['id'], find_att(man)))
+                if matches:
+                    check = matches[0]
+                    if len(headers) == 0:
+                        headers["X-TAXII-Date-Added-First"] = man["date_added"]
+                    new.append(check)
+                    temp = man
+                    if len(new) == limit:
+                        headers["X-TAXII-Date-Added-Last"] = man["date_added"]
             if limit and limit < len(data):
                 next_save = new[limit:]
                 new = new[:limit]
@@ -99,12 +107,13 @@ class BasicFilter(object):
             if string_to_datetime(obj["date_added"]) > added_after_timestamp:
                 return True
             return False
-        # for other objects with manifests
+        # for other objects with manifests; manifest_info may be given already
+        # grouped by (id, version) to avoid scanning the whole manifest
         else:
-            obj_time = find_att(obj)
-            for item in manifest_info:
-                item_time = find_att(item)
-                if item["id"] == obj["id"] and item_time == obj_time and string_to_datetime(item["date_added"]) > added_after_timestamp:
+            if not isinstance(manifest_info, dict):
+                manifest_info = group_by_id_and_version(manifest_info)
+            for item in manifest_info.get((obj["id"], find_att(obj)), []):
+                if string_to_datetime(item["date_added"]) > added_after_timestamp:
                     return True
             return False
 
@@ -181,6 +190,10 @@ class BasicFilter(object):
         match_objects = []
         if (self.match_type and "type" in allowed) or (self.match_id and "id" in allowed) \
            or (self.added_after_date) or ("spec_version" in allowed):
+            if self.added_after_date and manifest_info is not None:
+                manifest_by_version = group_by_id_and_version(manifest_info)
+            else:
+                manifest_by_version = manifest_info
             for obj in data:
                 if self.match_type and "type" in allowed:
                     if not (any(s == obj.get("type") for s in self.match_type)) and not (any(s == obj.get("id").split("--")[0] for s in self.match_type)):
@@ -190,7 +203,7 @@ class BasicFilter(object):
                         continue
 
                 if self.added_after_date:
-                    if not self.check_added_after(obj, manifest_info, self.added_after_date):
+                    if not self.check_added_after(obj, manifest_by_version, self.added_after_date):
                         continue
 
                 if "spec_version" in allowed:
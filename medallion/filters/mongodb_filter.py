@@ -1,7 +1,9 @@
 from bson.son import SON
 from pymongo import ASCENDING
 
-from ..common import datetime_to_float, string_to_datetime
+from ..common import (
+    datetime_to_float, media_type_for_spec_version, string_to_datetime
+)
 from .basic_filter import BasicFilter
 
 
@@ -33,14 +35,13 @@ class MongoDBFilter(BasicFilter):
             match_spec_version = self.filter_args.get("match[spec_version]")
             if match_spec_version and "spec_version" in allowed:
                 spec_versions = match_spec_version.split(",")
-                media_fmt = "application/stix+json;version={}"
                 if len(spec_versions) == 1:
                     parameters["_manifest.media_type"] = {
-                        "$eq": media_fmt.format(spec_versions[0])
+                        "$eq": media_type_for_spec_version(spec_versions[0])
                     }
                 else:
                     parameters["_manifest.media_type"] = {
-                        "$in": [media_fmt.format(x) for x in spec_versions]
+                        "$in": [media_type_for_spec_version(x) for x in spec_versions]
                     }
             added_after_date = self.filter_args.get("added_after")
             if added_after_date:
@@ -100,28 +101,36 @@ class MongoDBFilter(BasicFilter):
                 if query:
                     pipeline.append({"$match": {"$or": query}})
 
-        pipeline.append({"$sort": SON([("_manifest.date_added", ASCENDING), ("created", ASCENDING), ("modified", ASCENDING)])})
+        # _id last, so documents that tie on the other fields keep the same
+        # order from one page to the next
+        pipeline.append({"$sort": SON([("_manifest.date_added", ASCENDING), ("created", ASCENDING), ("modified", ASCENDING), ("_id", ASCENDING)])})
 
         if manifest_info == "manifests":
             # Project the final results
             pipeline.append({"$project": {"_manifest": 1}})
             pipeline.append({"$replaceRoot": {"newRoot": "$_manifest"}})
-
-            count = self.get_result_count(pipeline, data)
-            self.add_pagination_operations(pipeline)
-            results = list(data.aggregate(pipeline))
         elif manifest_info == "objects":
-            # Project the final results
+            # Project the final results, keeping when each object was added
+            # so the date added headers come from the same query
+            pipeline.append({"$addFields": {"_date_added": "$_manifest.date_added"}})
             pipeline.append({"$project": {"_id": 0, "_collection_id": 0, "_manifest": 0}})
+        # else: return raw data from Mongodb
 
-            count = self.get_result_count(pipeline, data)
-            self.add_pagination_operations(pipeline)
-            results = list(data.aggregate(pipeline))
+        count_pipeline = list(pipeline)
+        self.add_pagination_operations(pipeline)
+        if self.record:
+            # fetch the whole page in the first batch
+            results = list(data.aggregate(pipeline, batchSize=self.record["limit"]))
         else:
-            # Return raw data from Mongodb
-            count = self.get_result_count(pipeline, data)
-            self.add_pagination_operations(pipeline)
             results = list(data.aggregate(pipeline))
+        # the total only needs its own query when the page is full; otherwise
+        # this page is the last one and the total follows from it
+        if not self.record:
+            count = len(results)
+        elif len(results) < self.record["limit"]:
+            count = self.record["skip"] + len(results)
+        else:
+            count = self.get_result_count(count_pipeline, data)
 
         return count, results
 
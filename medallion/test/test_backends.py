@@ -1,6 +1,7 @@
 import copy
 import datetime
 import json
+import os
 import tempfile
 
 import pytest
@@ -108,6 +109,19 @@ def test_get_collections(backend):
     assert "365fed99-08fa-fdcd-a1b3-fb247eb41d01" in collection_ids
 
 
+def test_get_collections_interop_sorted(backend):
+    backend.app.medallion_backend.interop_requirements_enforced = True
+    try:
+        r = backend.client.get(test.COLLECTIONS_EP, headers=backend.headers)
+    finally:
+        backend.app.medallion_backend.interop_requirements_enforced = False
+
+    assert r.status_code == 200
+    collection_ids = [cm["id"] for cm in r.json["collections"]]
+    assert len(collection_ids) == 5
+    assert collection_ids == sorted(collection_ids)
+
+
 def test_get_objects(backend):
 
     r = backend.client.get(
@@ -341,6 +355,151 @@ def test_get_objects_limit(backend):
         assert objs["objects"][x]["id"] == correct_order[x]
 
 
+def _get_all_pages(backend, url, limit):
+    """Page through ``url`` and return every object, checking that only the
+    last page reports no more results."""
+    r = backend.client.get(url + "&limit=%d" % limit, headers=backend.headers)
+    pages = [r.json]
+    while r.json["more"]:
+        assert len(r.json["objects"]) == limit
+        r = backend.client.get(url + "&limit=%d&next=%s" % (limit, r.json["next"]), headers=backend.headers)
+        assert r.status_code == 200
+        pages.append(r.json)
+    return [obj for page in pages for obj in page["objects"]]
+
+
+def _delete_all_versions(backend, object_ids):
+    for object_id in object_ids:
+        r = backend.client.delete(
+            test.ADD_OBJECTS_EP + object_id + "/?match[version]=all",
+            headers=backend.headers,
+        )
+        assert r.status_code == 200
+
+
+def test_pagination_same_date_added(backend):
+    # added in one request, so every object has the same date_added (and the
+    # same created and modified): only the document id tells them apart
+    object_ids = ["indicator--1c5b6a2e-55f5-4a3b-9d0e-0d8c6f0a4b%02d" % i for i in range(7)]
+    new_objects = {
+        "objects": [
+            {
+                "type": "indicator",
+                "spec_version": "2.1",
+                "id": object_id,
+                "created": "2020-01-01T00:00:00.000Z",
+                "modified": "2020-01-01T00:00:00.000Z",
+                "pattern": "[file:name = 'same_date_added']",
+                "pattern_type": "stix",
+                "valid_from": "2020-01-01T00:00:00Z",
+            }
+            for object_id in object_ids
+        ]
+    }
+    r = backend.client.post(test.ADD_OBJECTS_EP, data=json.dumps(new_objects), headers=backend.post_headers)
+    assert r.status_code == 202
+
+    try:
+        objs = _get_all_pages(backend, test.ADD_OBJECTS_EP + "?match[id]=" + ",".join(object_ids), 2)
+        assert sorted(obj["id"] for obj in objs) == object_ids
+    finally:
+        _delete_all_versions(backend, object_ids)
+
+
+def test_pagination_missing_created_and_modified(backend):
+    # marking definitions have no modified, and the last object has neither
+    # created nor modified, so the page key holds nulls for them
+    marking_ids = ["marking-definition--5e2d8c1a-0f4b-4c6e-8a9d-3b7f1e6c2d%02d" % i for i in range(3)]
+    indicator_ids = ["indicator--7a3f9b2c-1d4e-4f5a-8b6c-9d0e1f2a3b%02d" % i for i in range(2)]
+    grouping_id = "grouping--4b8e2f6a-3c1d-4e5f-9a7b-6c8d0e2f4a01"
+    new_objects = {
+        "objects": [
+            {
+                "type": "marking-definition",
+                "spec_version": "2.1",
+                "id": marking_id,
+                "created": "2020-01-01T00:00:00.000Z",
+                "definition_type": "statement",
+                "definition": {"statement": "Copyright 2020"},
+            }
+            for marking_id in marking_ids
+        ] + [
+            {
+                "type": "indicator",
+                "spec_version": "2.1",
+                "id": indicator_id,
+                "created": "2020-01-01T00:00:00.000Z",
+                "modified": "2020-01-01T00:00:00.000Z",
+                "pattern": "[file:name = 'missing_modified']",
+                "pattern_type": "stix",
+                "valid_from": "2020-01-01T00:00:00Z",
+            }
+            for indicator_id in indicator_ids
+        ] + [
+            {
+                "type": "grouping",
+                "spec_version": "2.1",
+                "id": grouping_id,
+                "context": "unspecified",
+                "object_refs": indicator_ids,
+            },
+        ]
+    }
+    object_ids = marking_ids + indicator_ids + [grouping_id]
+    r = backend.client.post(test.ADD_OBJECTS_EP, data=json.dumps(new_objects), headers=backend.post_headers)
+    assert r.status_code == 202
+
+    try:
+        for limit in (1, 2, 4):
+            objs = _get_all_pages(backend, test.ADD_OBJECTS_EP + "?match[id]=" + ",".join(object_ids), limit)
+            assert sorted(obj["id"] for obj in objs) == sorted(object_ids)
+    finally:
+        _delete_all_versions(backend, object_ids)
+
+
+def test_pagination_within_versions(backend):
+    # the page boundaries fall between versions of the same object
+    object_id = "indicator--9c2e4a6b-8d0f-4e1a-b3c5-7d9f1b3d5e01"
+    versions = ["2020-01-0%dT00:00:00.000Z" % day for day in range(1, 6)]
+    new_objects = {
+        "objects": [
+            {
+                "type": "indicator",
+                "spec_version": "2.1",
+                "id": object_id,
+                "created": versions[0],
+                "modified": version,
+                "pattern": "[file:name = 'versions']",
+                "pattern_type": "stix",
+                "valid_from": "2020-01-01T00:00:00Z",
+            }
+            for version in versions
+        ]
+    }
+    r = backend.client.post(test.ADD_OBJECTS_EP, data=json.dumps(new_objects), headers=backend.post_headers)
+    assert r.status_code == 202
+
+    try:
+        for limit in (2, 3):
+            objs = _get_all_pages(backend, test.ADD_OBJECTS_EP + "?match[id]=" + object_id + "&match[version]=all", limit)
+            assert sorted(obj["modified"] for obj in objs) == versions
+
+            r = backend.client.get(
+                test.ADD_OBJECTS_EP + object_id + "/versions/?limit=%d" % limit,
+                headers=backend.headers,
+            )
+            listed = r.json["versions"]
+            while r.json["more"]:
+                r = backend.client.get(
+                    test.ADD_OBJECTS_EP + object_id + "/versions/?limit=%d&next=%s" % (limit, r.json["next"]),
+                    headers=backend.headers,
+                )
+                listed += r.json["versions"]
+            assert sorted(listed) == versions
+    finally:
+        _delete_all_versions(backend, [object_id])
+
+
 def test_get_objects_id(backend):
     r = backend.client.get(
         test.GET_OBJECTS_EP + "?match[id]=malware--c0931cc6-c75e-47e5-9036-78fabc95d4ec",
@@ -1442,6 +1601,61 @@ def test_object_already_present(backend):
     assert "successes" in status_data
 
 
+def test_object_duplicated_in_bundle(backend):
+    new_object = {
+        "created": "2014-05-08T09:00:00.000Z",
+        "modified": "2014-05-08T09:00:00.000Z",
+        "id": "indicator--0b8d0f5c-9b4f-4f4e-9f4b-2a4f0e1b2c3d",
+        "name": "Duplicated indicator",
+        "pattern": "[file:hashes.MD5 = 'd41d8cd98f00b204e9800998ecf8427e']",
+        "pattern_type": "stix",
+        "spec_version": "2.1",
+        "type": "indicator",
+        "valid_from": "2014-05-08T09:00:00.000000Z",
+    }
+    add_objects = {"objects": [new_object, copy.deepcopy(new_object)]}
+
+    r_post = backend.client.post(
+        test.ADD_OBJECTS_EP,
+        data=json.dumps(add_objects),
+        headers=backend.post_headers,
+    )
+    status_data = r_post.json
+    assert r_post.status_code == 202
+    assert status_data["success_count"] == 2
+    assert "message" not in status_data["successes"][0]
+    assert status_data["successes"][1]["message"] == "Object already added"
+
+
+def test_large_integer_round_trip(backend):
+    if backend.type != "memory":
+        # BSON integers are limited to 64 bits
+        pytest.skip()
+    object_id = "x-custom--5d1f8e2a-7b3c-4a9e-8f6d-2c4b6a8e0f13"
+    large = 123456789012345678901234567890
+    new_objects = {
+        "objects": [
+            {
+                "type": "x-custom",
+                "spec_version": "2.1",
+                "id": object_id,
+                "created": "2020-01-01T00:00:00.000Z",
+                "modified": "2020-01-01T00:00:00.000Z",
+                "x_large_value": large,
+            }
+        ]
+    }
+    r = backend.client.post(test.ADD_OBJECTS_EP, data=json.dumps(new_objects), headers=backend.post_headers)
+    assert r.status_code == 202
+
+    try:
+        r = backend.client.get(test.ADD_OBJECTS_EP + object_id + "/", headers=backend.headers)
+        assert r.status_code == 200
+        assert json.loads(r.data)["objects"][0]["x_large_value"] == large
+    finally:
+        _delete_all_versions(backend, [object_id])
+
+
 def test_save_to_file(backend):
     if backend.type != "memory":
         pytest.skip()
@@ -1456,6 +1670,103 @@ def test_save_to_file(backend):
         assert data['trustgroup1']['collections'][3]['id'] == "52892447-4d7e-4f70-b94d-d7f22742ff63"
 
 
+@pytest.mark.parametrize("indent", [2, 4])
+def test_save_to_file_indent(backend, indent):
+    if backend.type != "memory":
+        pytest.skip()
+    with tempfile.NamedTemporaryFile(mode='w') as tmpfile:
+        backend.app.medallion_backend.save_data_to_file(tmpfile.name, indent=indent)
+        tmpfile.flush()
+        with open(tmpfile.name) as f:
+            lines = f.read().splitlines()
+        # the second line holds the first api root key, indented once
+        assert lines[1].startswith(" " * indent + '"')
+        assert not lines[1].startswith(" " * (indent + 1))
+
+
+@pytest.mark.parametrize("indent", [0, None])
+def test_save_to_file_explicit_indent(backend, indent):
+    if backend.type != "memory":
+        pytest.skip()
+    with tempfile.NamedTemporaryFile(mode='w') as tmpfile:
+        backend.app.medallion_backend.save_data_to_file(tmpfile.name, indent=indent)
+        tmpfile.flush()
+        with open(tmpfile.name) as f:
+            saved = f.read()
+        assert saved == json.dumps(backend.app.medallion_backend.data, indent=indent)
+
+
+def test_save_to_file_large_integer(backend):
+    if backend.type != "memory":
+        pytest.skip()
+    memory_backend = backend.app.medallion_backend
+    large = 123456789012345678901234567890
+    memory_backend.data["trustgroup1"]["information"]["x_large_value"] = large
+    try:
+        for kwargs in ({}, {"indent": 2}):
+            with tempfile.NamedTemporaryFile(mode='w') as tmpfile:
+                memory_backend.save_data_to_file(tmpfile.name, **kwargs)
+                with open(tmpfile.name, "rb") as f:
+                    assert memory_backend._load_json(f)["trustgroup1"]["information"]["x_large_value"] == large
+    finally:
+        del memory_backend.data["trustgroup1"]["information"]["x_large_value"]
+
+
+def test_save_to_file_failure_keeps_file(backend):
+    if backend.type != "memory":
+        pytest.skip()
+    memory_backend = backend.app.medallion_backend
+    with tempfile.NamedTemporaryFile(mode='w') as tmpfile:
+        tmpfile.write("previous")
+        tmpfile.flush()
+        memory_backend.data["trustgroup1"]["information"]["x_unserializable"] = object()
+        try:
+            with pytest.raises(TypeError):
+                memory_backend.save_data_to_file(tmpfile.name)
+        finally:
+            del memory_backend.data["trustgroup1"]["information"]["x_unserializable"]
+        with open(tmpfile.name) as f:
+            assert f.read() == "previous"
+        assert not os.path.exists(tmpfile.name + ".tmp")
+
+
+def test_pagination_sessions_bounded(backend):
+    if backend.type != "memory":
+        pytest.skip()
+    backend_app = backend.app.medallion_backend
+    max_sessions = backend_app.max_sessions
+    backend_app.max_sessions = 2
+    try:
+        first = backend_app.set_next([], {})
+        second = backend_app.set_next([], {})
+        third = backend_app.set_next([], {})
+        assert first not in backend_app.next
+        assert second in backend_app.next
+        assert third in backend_app.next
+    finally:
+        backend_app.max_sessions = max_sessions
+        backend_app.next.pop(second, None)
+        backend_app.next.pop(third, None)
+
+
+def test_expired_sessions_cleanup(backend):
+    if backend.type != "memory":
+        pytest.skip()
+    backend_app = backend.app.medallion_backend
+    pending = backend_app.next.copy()
+    backend_app.next.clear()
+    try:
+        expired = backend_app.set_next([], {})
+        backend_app.next[expired]["request_time"] -= backend_app.timeout + 1
+        active = backend_app.set_next([], {})
+        backend_app._pop_expired_sessions()
+        assert expired not in backend_app.next
+        assert active in backend_app.next
+    finally:
+        backend_app.next.clear()
+        backend_app.next.update(pending)
+
+
 def test_status_cleanup(backend_without_threads):
     backend_app = backend_without_threads.app.medallion_backend
     # add a status with the current time, which should not be deleted.
@@ -1530,3 +1841,35 @@ def test_get_objects_match_type_spec_version(backend):
     assert obj['objects'][0]['type'] == "indicator"
     assert obj['objects'][0]['id'] == object_id
     assert obj['objects'][0]['spec_version'] == "2.0"
+
+
+@pytest.mark.skipif(common.ciso8601 is None, reason="ciso8601 is not installed")
+@pytest.mark.parametrize("timestamp", [
+    "2017-01-27T13:49Z",
+    "20170127T134953Z",
+    "2017-01-27 13:49:53.935Z",
+    "2017-01-27T24:00:00Z",
+    "2017-01-27T13:49:53.9350001Z",
+])
+def test_string_to_datetime_rejects_loose_timestamps(timestamp):
+    # ciso8601 must not make timestamps valid that strptime rejects
+    with pytest.raises(ValueError):
+        common.string_to_datetime(timestamp)
+
+
+@pytest.mark.parametrize("timestamp, expected", [
+    ("2017-01-27T13:49:53Z", datetime.datetime(2017, 1, 27, 13, 49, 53)),
+    ("2017-01-27T13:49:53.935Z", datetime.datetime(2017, 1, 27, 13, 49, 53, 935000)),
+    ("2017-01-27T13:49:53.935123Z", datetime.datetime(2017, 1, 27, 13, 49, 53, 935123)),
+])
+def test_string_to_datetime(timestamp, expected):
+    assert common.string_to_datetime(timestamp) == expected
+
+
+@pytest.mark.parametrize("spec_version, expected", [
+    ("2.1", "application/stix+json;version=2.1"),
+    (2.1, "application/stix+json;version=2.1"),
+    (["2.1"], "application/stix+json;version=['2.1']"),
+])
+def test_media_type_for_spec_version(spec_version, expected):
+    assert common.media_type_for_spec_version(spec_version) == expected
@@ -77,6 +77,12 @@ setup(
         "mongo": [
             "pymongo",
         ],
+        "orjson": [
+            "orjson",
+        ],
+        "ciso8601": [
+            "ciso8601",
+        ],
     },
     project_urls={
         'Documentation': 'https://medallion.readthedocs.io/',